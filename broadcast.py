@@ -0,0 +1,359 @@
+"""Broadcast a message to every user with a given verification status."""
+import asyncio
+import json
+import logging
+import os
+import time
+
+from telegram import MessageEntity
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter
+
+logger = logging.getLogger(__name__)
+
+# Telegram lets a bot send about 30 messages per second across all chats
+MESSAGES_PER_SECOND = 30
+CONCURRENCY = 10
+MAX_ATTEMPTS = 5
+# Unexpected errors before a broadcast gives up; past this something is
+# systematically wrong, such as the bot's connection being closed
+MAX_ERRORS = 100
+PROGRESS_INTERVAL = 5
+CHECKPOINT_FILE = os.getenv('BROADCAST_CHECKPOINT', 'broadcast_checkpoint.json')
+
+
+def iter_recipients(users_db, status='approved', after=None):
+    """Yield IDs of users with the given status in ascending order.
+
+    Only the IDs are snapshotted, so users added mid-broadcast don't break
+    iteration, and ascending order gives a stable cursor to resume from.
+    Users whose chat is known to be blocked are skipped.
+    """
+    for user_id in sorted(users_db):
+        if after is not None and user_id <= after:
+            continue
+        user = users_db.get(user_id)
+        if user and user.get('status') == status and not user.get('blocked'):
+            yield user_id
+
+
+def load_checkpoint(checkpoint_file=CHECKPOINT_FILE):
+    """Saved progress of an unfinished broadcast, or None if there is none."""
+    try:
+        with open(checkpoint_file) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.error(f"Can't read broadcast checkpoint {checkpoint_file}: {e}")
+        return None
+
+
+def discard_checkpoint(checkpoint_file=CHECKPOINT_FILE):
+    """Drop an unfinished broadcast; returns whether there was one."""
+    try:
+        os.remove(checkpoint_file)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+class RateLimiter:
+    """Spread sends out so no more than `rate` start per second."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds):
+        """Hold every sender back after Telegram asks us to slow down."""
+        self._next = max(self._next, time.monotonic() + seconds)
+
+
+class Broadcast:
+    """A resumable broadcast to all users with one status.
+
+    Progress is checkpointed to disk after every recipient: everyone up to
+    `cursor` has been handled, plus the IDs in `done` above it. A restarted
+    broadcast skips both, so nobody is messaged twice. The one exception is
+    a crash between Telegram accepting a message and the checkpoint write.
+    Users whose send failed unexpectedly go to `retry` and are sent to
+    first when the broadcast is resumed.
+    """
+
+    def __init__(self, bot, users_db, text, status='approved', admin_chat_id=None,
+                 checkpoint_file=CHECKPOINT_FILE, entities=None):
+        self.bot = bot
+        self.users_db = users_db
+        self.text = text
+        self.entities = tuple(entities or ())
+        self.status = status
+        self.admin_chat_id = admin_chat_id
+        self.checkpoint_file = checkpoint_file
+
+        self.cursor = None
+        self.done = set()
+        self.retry = set()
+        self.sent = 0
+        self.failed = 0
+        self.blocked = 0
+        self.total = 0
+        self.started_at = time.time()
+        self.finished = False
+
+        self._pending = set()
+        self._errors = 0
+        self._limiter = RateLimiter(MESSAGES_PER_SECOND)
+        self._task = None
+        self._progress_message = None
+
+    @classmethod
+    def resume(cls, bot, users_db, checkpoint_file=CHECKPOINT_FILE):
+        """Rebuild an interrupted broadcast from its checkpoint, if there is one."""
+        data = load_checkpoint(checkpoint_file)
+        if data is None:
+            return None
+
+        # users_db lives in memory, so after a restart it's empty. Resuming
+        # would find nobody and report success, so keep the checkpoint instead.
+        if not users_db:
+            logger.warning(f"Not resuming broadcast from {checkpoint_file}: no users loaded")
+            return None
+        return cls.from_checkpoint(bot, users_db, data, checkpoint_file)
+
+    @classmethod
+    def from_checkpoint(cls, bot, users_db, data, checkpoint_file=CHECKPOINT_FILE):
+        """Rebuild a broadcast from checkpoint data returned by `load_checkpoint`."""
+        broadcast = cls(bot, users_db, data['text'], data['status'],
+                        data.get('admin_chat_id'), checkpoint_file,
+                        MessageEntity.de_list(data.get('entities'), bot))
+        broadcast.cursor = data['cursor']
+        broadcast.done = set(data['done'])
+        broadcast.retry = set(data.get('retry', []))
+        broadcast.sent = data['sent']
+        broadcast.failed = data['failed']
+        broadcast.blocked = data['blocked']
+        broadcast.total = data.get('total', 0)
+        broadcast.started_at = data['started_at']
+        return broadcast
+
+    @property
+    def processed(self):
+        return self.sent + self.failed + self.blocked
+
+    @property
+    def unreached(self):
+        return max(self.total - self.processed, 0)
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Run the broadcast in the background."""
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        """Cancel a running broadcast; its checkpoint is kept for resuming."""
+        if self.running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def run(self):
+        """Send the message to every remaining recipient."""
+        retrying = set(self.retry)
+        self.total = self.processed + len(retrying) + sum(
+            1 for user_id in iter_recipients(self.users_db, self.status, self.cursor)
+            if user_id not in self.done and user_id not in retrying
+        )
+        logger.info(f"Broadcast to {self.total} {self.status} users started")
+        self._save()
+
+        queue = asyncio.Queue(maxsize=CONCURRENCY * 2)
+        workers = [asyncio.create_task(self._worker(queue)) for _ in range(CONCURRENCY)]
+        reporter = asyncio.create_task(self._report_progress())
+        try:
+            # Users to retry are kept out of `_pending`, so they never hold
+            # back the cursor, and are skipped when the scan reaches them
+            for user_id in sorted(retrying):
+                await queue.put(user_id)
+            for user_id in iter_recipients(self.users_db, self.status, self.cursor):
+                if user_id in self.done or user_id in retrying:
+                    continue
+                if self._errors >= MAX_ERRORS:
+                    logger.error(f"Broadcast stopped after {self._errors} errors")
+                    break
+                self._pending.add(user_id)
+                await queue.put(user_id)
+            await queue.join()
+        finally:
+            for task in workers + [reporter]:
+                task.cancel()
+            await asyncio.gather(*workers, reporter, return_exceptions=True)
+
+        if self.retry or self._errors >= MAX_ERRORS:
+            logger.warning(f"Broadcast stopped with {len(self.retry)} users to retry")
+            await self._update_progress_message()
+            return
+
+        self.finished = True
+        try:
+            os.remove(self.checkpoint_file)
+        except FileNotFoundError:
+            pass
+        logger.info(f"Broadcast finished: {self.sent} sent, {self.blocked} blocked, "
+                    f"{self.failed} failed")
+        await self._update_progress_message()
+
+    async def _worker(self, queue):
+        while True:
+            user_id = await queue.get()
+            if self._errors >= MAX_ERRORS:
+                # Giving up: leave what's already queued for the resumed broadcast
+                self._defer(user_id)
+            else:
+                try:
+                    await self._deliver(user_id)
+                except Exception as e:
+                    # No answer from Telegram, so the user is retried on resume.
+                    # A cancelled send skips both branches and stays pending.
+                    logger.error(f"Broadcast error for user {user_id}: {e}")
+                    self._errors += 1
+                    self._defer(user_id)
+                else:
+                    self._complete(user_id)
+            queue.task_done()
+
+    async def _deliver(self, user_id):
+        for _ in range(MAX_ATTEMPTS):
+            await self._limiter.wait()
+            try:
+                await self.bot.send_message(
+                    chat_id=user_id, text=self.text, entities=self.entities or None
+                )
+                self.sent += 1
+                return
+            except RetryAfter as e:
+                # Flood control: nothing was sent, so retrying is safe
+                logger.warning(f"Broadcast flood control, pausing {e.retry_after}s")
+                self._limiter.pause(e.retry_after)
+            except Forbidden as e:
+                # The user blocked the bot or deleted their account
+                self._mark_blocked(user_id, e)
+                return
+            except BadRequest as e:
+                if 'chat not found' in e.message.lower():
+                    self._mark_blocked(user_id, e)
+                    return
+                logger.error(f"Broadcast to user {user_id} rejected: {e}")
+                break
+            except NetworkError as e:
+                # The message may have gone out, so don't risk sending it twice
+                logger.error(f"Broadcast to user {user_id} failed: {e}")
+                break
+        self.failed += 1
+
+    def _mark_blocked(self, user_id, error):
+        self.blocked += 1
+        user = self.users_db.get(user_id)
+        if user is not None:
+            user['blocked'] = True
+        logger.info(f"User {user_id} is unreachable: {error}")
+
+    def _complete(self, user_id):
+        self._pending.discard(user_id)
+        if user_id in self.retry:
+            self.retry.discard(user_id)
+        else:
+            self.done.add(user_id)
+        self._advance()
+        self._save()
+
+    def _defer(self, user_id):
+        self._pending.discard(user_id)
+        self.retry.add(user_id)
+        self._advance()
+        self._save()
+
+    def _advance(self):
+        # Everything dispatched below the lowest in-flight ID is finished,
+        # so fold it into the cursor and keep `done` small.
+        lowest = min(self._pending) if self._pending else None
+        finished = {d for d in self.done if lowest is None or d < lowest}
+        if finished:
+            self.cursor = max(finished)
+            self.done -= finished
+
+    def _save(self):
+        data = {
+            'text': self.text,
+            'entities': [entity.to_dict() for entity in self.entities],
+            'status': self.status,
+            'admin_chat_id': self.admin_chat_id,
+            'cursor': self.cursor,
+            'done': sorted(self.done),
+            'retry': sorted(self.retry),
+            'sent': self.sent,
+            'failed': self.failed,
+            'blocked': self.blocked,
+            'total': self.total,
+            'started_at': self.started_at,
+        }
+        tmp_file = f"{self.checkpoint_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_file, self.checkpoint_file)
+
+    def report(self):
+        """Human readable progress summary."""
+        elapsed = time.time() - self.started_at
+        percent = self.processed / self.total * 100 if self.total else 100
+        if self.finished:
+            state = "✅ Finished"
+        elif self.running:
+            state = "📣 In progress"
+        else:
+            state = f"⏸ Stopped, {self.unreached} users not reached"
+        return (
+            f"{state}\n\n"
+            f"👥 Recipients: {self.total}\n"
+            f"📊 Progress: {self.processed} ({percent:.1f}%)\n"
+            f"✅ Sent: {self.sent}\n"
+            f"🚫 Blocked: {self.blocked}\n"
+            f"❌ Failed: {self.failed}\n"
+            f"⏱ Elapsed: {int(elapsed)}s"
+        )
+
+    async def _report_progress(self):
+        while True:
+            await self._update_progress_message()
+            await asyncio.sleep(PROGRESS_INTERVAL)
+
+    async def _update_progress_message(self):
+        if not self.admin_chat_id:
+            return
+        try:
+            if self._progress_message is None:
+                self._progress_message = await self.bot.send_message(
+                    chat_id=self.admin_chat_id, text=self.report()
+                )
+            else:
+                await self._progress_message.edit_text(self.report())
+        except BadRequest as e:
+            # Editing with unchanged text is rejected by Telegram
+            if 'not modified' not in e.message.lower():
+                logger.warning(f"Couldn't update broadcast progress: {e}")
+        except Exception as e:
+            logger.warning(f"Couldn't update broadcast progress: {e}")
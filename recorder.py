@@ -0,0 +1,165 @@
+"""Record incoming updates so production traffic can be replayed later."""
+import glob
+import gzip
+import json
+import logging
+import os
+import re
+import time
+from datetime import datetime
+
+from telegram import Update
+from telegram.ext import ConversationHandler, TypeHandler
+
+logger = logging.getLogger(__name__)
+
+# Recording is off unless a directory is configured
+RECORD_UPDATES_DIR = os.getenv('RECORD_UPDATES_DIR')
+MAX_BYTES = 50 * 1024 * 1024
+BACKUP_COUNT = 20
+FILE_PATTERN = 'updates-*.jsonl.gz'
+AFTER_GROUP = 1000
+# Admin commands that act on another user, like /approve_123
+TARGET_COMMAND = re.compile(r'^/\w+?_(\d+)$')
+
+
+class UpdateRecorder:
+    """Append records as JSON lines to gzip files, rotating them by size.
+
+    Every record is flushed on its own, so a crash loses at most the record
+    being written; `read_records` tolerates the missing gzip trailer.
+    """
+
+    def __init__(self, directory, max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._file = None
+        self._size = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, record):
+        line = (json.dumps(record, separators=(',', ':')) + '\n').encode()
+        if self._file is None or self._size >= self.max_bytes:
+            self._rotate()
+        self._file.write(line)
+        self._file.flush()
+        self._size += len(line)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _rotate(self):
+        self.close()
+        # Names sort chronologically, which is the order replay reads them in
+        name = datetime.now().strftime('updates-%Y%m%d-%H%M%S-%f.jsonl.gz')
+        self._file = gzip.open(os.path.join(self.directory, name), 'wb')
+        self._size = 0
+
+        old_files = sorted(glob.glob(os.path.join(self.directory, FILE_PATTERN)))
+        for path in old_files[:-self.backup_count]:
+            os.remove(path)
+
+
+def read_records(paths):
+    """Yield records from recording files, expanding directories, in order."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, FILE_PATTERN))))
+        else:
+            files.append(path)
+
+    for path in files:
+        try:
+            with gzip.open(path, 'rt') as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        logger.warning(f"Skipping corrupt record in {path}")
+        except EOFError:
+            # The bot stopped without closing the file
+            logger.info(f"{path} is truncated, read up to the last flush")
+
+
+def target_user_ids(update):
+    """IDs of other users an update acts on, such as the user in /approve_123."""
+    message = update.effective_message
+    match = TARGET_COMMAND.match(message.text or '') if message else None
+    return [int(match.group(1))] if match else []
+
+
+def snapshot_state(application, update, users_db):
+    """Conversation state and verification status of the update's user.
+
+    Users the update acts on are included under 'targets', keyed by their
+    ID as a string so snapshots compare equal after a JSON round trip.
+    """
+    state = None
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            if not isinstance(handler, ConversationHandler):
+                continue
+            try:
+                key = handler._get_key(update)
+            except RuntimeError:
+                continue
+            # PTB keeps no public accessor for the current state
+            current = handler._conversations.get(key)
+            if isinstance(current, int):
+                state = current
+
+    user = update.effective_user
+    status = users_db.get(user.id, {}).get('status') if user else None
+    snapshot = {'state': state, 'status': status}
+
+    targets = {
+        str(user_id): users_db.get(user_id, {}).get('status')
+        for user_id in target_user_ids(update)
+    }
+    if targets:
+        snapshot['targets'] = targets
+    return snapshot
+
+
+def record_updates(application, recorder, users_db):
+    """Record every update with the user's state before and after it is handled.
+
+    A record is written once the bot's handlers have run, so it can include
+    the state they left behind under 'after'. Updates are handled one at a
+    time, so a record still waiting when the next update arrives means its
+    handlers were cut short; it is written without 'after'.
+    """
+    waiting = {}
+
+    def write(record):
+        try:
+            recorder.write(record)
+        except Exception as e:
+            logger.error(f"Error recording update {record['update']['update_id']}: {e}")
+
+    async def before(update: Update, context):
+        for stale in waiting.values():
+            write(stale)
+        waiting.clear()
+        try:
+            waiting[update.update_id] = {
+                'time': time.time(),
+                'update': update.to_dict(),
+                **snapshot_state(context.application, update, users_db),
+            }
+        except Exception as e:
+            logger.error(f"Error recording update {update.update_id}: {e}")
+
+    async def after(update: Update, context):
+        record = waiting.pop(update.update_id, None)
+        if record is not None:
+            record['after'] = snapshot_state(context.application, update, users_db)
+            write(record)
+
+    # Group -1 runs before the bot's own handlers and AFTER_GROUP after them
+    application.add_handler(TypeHandler(Update, before), group=-1)
+    application.add_handler(TypeHandler(Update, after), group=AFTER_GROUP)
@@ -0,0 +1,273 @@
+"""Replay recorded updates against a fresh bot and a fake Bot API.
+
+Usage:
+    python replay.py RECORDINGS... [--fast]
+
+RECORDINGS are files or directories written by the update recorder.
+Updates are fed to the Application built by verification_bot.py at their recorded pace,
+or back to back with --fast. Afterwards handler latencies, Bot API calls,
+errors and any state divergence from the recording are reported. The exit
+status is non-zero if there were errors or divergences.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+from telegram import Update
+from telegram.ext import Application, ConversationHandler
+from telegram.request import BaseRequest
+
+from recorder import read_records, snapshot_state
+
+FAKE_TOKEN = '123456:replay'
+
+
+# Bot API methods the fake models, by what the real API returns
+MESSAGE_METHODS = {
+    'sendMessage', 'sendPhoto', 'sendDocument', 'sendVideo', 'sendAudio', 'sendVoice',
+    'sendAnimation', 'sendVideoNote', 'sendSticker', 'sendLocation', 'sendVenue',
+    'sendContact', 'sendPoll', 'sendDice', 'forwardMessage',
+}
+# These return True instead of a Message for inline messages
+EDIT_METHODS = {
+    'editMessageText', 'editMessageCaption', 'editMessageMedia', 'editMessageReplyMarkup',
+    'editMessageLiveLocation', 'stopMessageLiveLocation',
+}
+TRUE_METHODS = {
+    'sendChatAction', 'deleteMessage', 'answerCallbackQuery', 'answerInlineQuery',
+    'pinChatMessage', 'unpinChatMessage', 'setMyCommands', 'deleteMyCommands',
+    'setWebhook', 'deleteWebhook',
+}
+
+
+class FakeBotAPI(BaseRequest):
+    """In-process stand-in for the Bot API that accepts every call.
+
+    Methods it doesn't model raise, so they show up as handler errors
+    instead of being answered with a result of the wrong type.
+    """
+
+    def __init__(self):
+        self.calls = Counter()
+        self._message_id = 0
+
+    @property
+    def read_timeout(self):
+        return None
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None,
+                         write_timeout=None, connect_timeout=None, pool_timeout=None):
+        api_method = url.rsplit('/', 1)[-1]
+        self.calls[api_method] += 1
+        params = request_data.parameters if request_data else {}
+
+        if api_method == 'getMe':
+            result = {'id': 1, 'is_bot': True, 'first_name': 'Replay', 'username': 'replay_bot'}
+        elif api_method in MESSAGE_METHODS:
+            result = self._message(params)
+        elif api_method in EDIT_METHODS:
+            result = True if params.get('inline_message_id') else self._message(params)
+        elif api_method == 'sendMediaGroup':
+            result = [self._message(params) for _ in params.get('media', [])]
+        elif api_method == 'copyMessage':
+            result = {'message_id': self._message(params)['message_id']}
+        elif api_method in TRUE_METHODS:
+            result = True
+        else:
+            raise NotImplementedError(f"Fake Bot API does not model {api_method}")
+        return 200, json.dumps({'ok': True, 'result': result}).encode()
+
+    def _message(self, params):
+        self._message_id += 1
+        return {
+            'message_id': self._message_id,
+            'date': int(time.time()),
+            'chat': {'id': params.get('chat_id', 0), 'type': 'private'},
+            'text': params.get('text') or params.get('caption') or '',
+        }
+
+
+def handler_name(application, update):
+    """Name of the callback the update will be dispatched to."""
+    for group in sorted(application.handlers):
+        if group < 0:
+            continue
+        for handler in application.handlers[group]:
+            check = handler.check_update(update)
+            if check is None or check is False:
+                continue
+            if isinstance(handler, ConversationHandler):
+                # The check result carries the state's handler that will run
+                handler = check[2]
+            return getattr(handler.callback, '__name__', repr(handler.callback))
+    return 'unhandled'
+
+
+def comparable(snapshot, known_users):
+    """The parts of a snapshot the replay can reproduce.
+
+    Targets are only kept for users whose whole history is in the replay.
+    """
+    result = {'state': snapshot.get('state'), 'status': snapshot.get('status')}
+    targets = {
+        user_id: status for user_id, status in snapshot.get('targets', {}).items()
+        if int(user_id) in known_users
+    }
+    if targets:
+        result['targets'] = targets
+    return result
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[round(fraction * (len(ordered) - 1))]
+
+
+async def replay(records, fast, verification_bot):
+    """Feed records to a fresh Application and collect the results."""
+    api = FakeBotAPI()
+    application = verification_bot.build_application(
+        Application.builder().token(FAKE_TOKEN).request(api).get_updates_request(FakeBotAPI()),
+        record_dir=None,
+    )
+
+    errors = []
+
+    async def count_error(update, context):
+        errors.append((update.update_id if isinstance(update, Update) else None, context.error))
+
+    application.add_error_handler(count_error)
+
+    latencies = defaultdict(list)
+    divergences = []
+    seen_users = set()
+    unknown_users = set()
+    known_users = set()
+    replayed = 0
+
+    async with application:
+        first_time = None
+        started = time.monotonic()
+        for record in records:
+            update = Update.de_json(record['update'], application.bot)
+
+            if not fast:
+                first_time = first_time or record['time']
+                delay = (record['time'] - first_time) - (time.monotonic() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            # Users who were mid-conversation when recording started can't be
+            # checked, since the replay begins from an empty state.
+            user = update.effective_user
+            if user and user.id not in seen_users:
+                seen_users.add(user.id)
+                if record.get('state') is None and record.get('status') is None:
+                    known_users.add(user.id)
+                else:
+                    unknown_users.add(user.id)
+            checked = user is not None and user.id in known_users
+
+            # The state after the previous update is checked already, unless
+            # that record has no 'after' snapshot
+            if checked and 'after' not in record:
+                expected = comparable(record, known_users)
+                actual = comparable(
+                    snapshot_state(application, update, verification_bot.users_db), known_users
+                )
+                if actual != expected:
+                    divergences.append((update.update_id, user.id, 'before', expected, actual))
+
+            name = handler_name(application, update)
+            start = time.perf_counter()
+            await application.process_update(update)
+            latencies[name].append(time.perf_counter() - start)
+            replayed += 1
+
+            if checked and 'after' in record:
+                expected = comparable(record['after'], known_users)
+                actual = comparable(
+                    snapshot_state(application, update, verification_bot.users_db), known_users
+                )
+                if actual != expected:
+                    divergences.append((update.update_id, user.id, 'after', expected, actual))
+
+        elapsed = time.monotonic() - started
+        if application.post_stop:
+            await application.post_stop(application)
+
+    return {
+        'replayed': replayed,
+        'elapsed': elapsed if replayed else 0.0,
+        'latencies': latencies,
+        'calls': api.calls,
+        'errors': errors,
+        'divergences': divergences,
+        'unknown_users': unknown_users,
+    }
+
+
+def print_report(result):
+    print(f"Replayed {result['replayed']} updates in {result['elapsed']:.2f}s")
+    print()
+    print(f"{'Handler':<28}{'Count':>7}{'Mean':>10}{'p50':>10}{'p95':>10}{'Max':>10}  (ms)")
+    for name, values in sorted(result['latencies'].items()):
+        print(
+            f"{name:<28}{len(values):>7}"
+            f"{sum(values) / len(values) * 1000:>10.2f}"
+            f"{percentile(values, 0.5) * 1000:>10.2f}"
+            f"{percentile(values, 0.95) * 1000:>10.2f}"
+            f"{max(values) * 1000:>10.2f}"
+        )
+
+    print()
+    calls = ', '.join(f"{method} {count}" for method, count in result['calls'].most_common())
+    print(f"Bot API calls: {calls or 'none'}")
+
+    if result['unknown_users']:
+        print(f"Not checked: {len(result['unknown_users'])} users already mid-verification "
+              f"when recording started")
+
+    print(f"Errors: {len(result['errors'])}")
+    for update_id, error in result['errors']:
+        print(f"  update {update_id}: {error!r}")
+
+    print(f"Divergences: {len(result['divergences'])}")
+    for update_id, user_id, phase, expected, actual in result['divergences']:
+        print(f"  update {update_id} user {user_id} ({phase} handling): "
+              f"recorded {expected}, replayed {actual}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded Telegram updates.")
+    parser.add_argument('recordings', nargs='+', help="recording files or directories")
+    parser.add_argument('--fast', action='store_true',
+                        help="send updates back to back instead of at recorded speed")
+    args = parser.parse_args()
+
+    # Keep a replayed broadcast away from the real checkpoint
+    os.environ['BROADCAST_CHECKPOINT'] = os.path.join(
+        tempfile.mkdtemp(), 'broadcast_checkpoint.json'
+    )
+    import verification_bot
+
+    result = asyncio.run(
+        replay(read_records(args.recordings), args.fast, verification_bot)
+    )
+    print_report(result)
+    return 1 if result['errors'] or result['divergences'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,226 @@
+import asyncio
+import os
+
+import pytest
+from telegram import MessageEntity
+from telegram.error import BadRequest, Forbidden, RetryAfter
+
+import broadcast
+from broadcast import Broadcast, discard_checkpoint, iter_recipients, load_checkpoint
+
+
+class FakeBot:
+    """Records sends; `errors` maps chat IDs to exceptions raised in turn."""
+
+    def __init__(self, errors=None, delay=0):
+        self.errors = errors or {}
+        self.delay = delay
+        self.attempts = []
+        self.sent = []
+        self.entities = None
+
+    async def send_message(self, chat_id, text, entities=None):
+        self.attempts.append(chat_id)
+        self.entities = entities
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.errors.get(chat_id):
+            raise self.errors[chat_id].pop(0)
+        self.sent.append(chat_id)
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limit(monkeypatch):
+    monkeypatch.setattr(broadcast, 'MESSAGES_PER_SECOND', 100000)
+
+
+@pytest.fixture
+def checkpoint(tmp_path):
+    return str(tmp_path / 'checkpoint.json')
+
+
+def make_users(count):
+    return {i: {'status': 'approved' if i % 2 else 'pending'} for i in range(1, count + 1)}
+
+
+def approved(users_db):
+    return [i for i, user in users_db.items() if user['status'] == 'approved']
+
+
+def test_sends_once_to_every_user_with_status(checkpoint):
+    users_db = make_users(50)
+    bot = FakeBot()
+    b = Broadcast(bot, users_db, "hello", checkpoint_file=checkpoint)
+
+    asyncio.run(b.run())
+
+    assert sorted(bot.sent) == approved(users_db)
+    assert b.sent == 25 and b.finished
+    assert not os.path.exists(checkpoint)
+
+
+def test_retry_after_pauses_and_retries(checkpoint):
+    users_db = {1: {'status': 'approved'}}
+    bot = FakeBot(errors={1: [RetryAfter(0), RetryAfter(0)]})
+    b = Broadcast(bot, users_db, "hello", checkpoint_file=checkpoint)
+
+    asyncio.run(b.run())
+
+    assert bot.attempts == [1, 1, 1]
+    assert bot.sent == [1]
+    assert (b.sent, b.failed) == (1, 0)
+
+
+def test_unreachable_chats_are_marked_blocked(checkpoint):
+    users_db = {1: {'status': 'approved'}, 2: {'status': 'approved'}, 3: {'status': 'approved'}}
+    bot = FakeBot(errors={
+        1: [Forbidden("Forbidden: bot was blocked by the user")],
+        2: [BadRequest("Chat not found")],
+    })
+    b = Broadcast(bot, users_db, "hello", checkpoint_file=checkpoint)
+
+    asyncio.run(b.run())
+
+    assert (b.sent, b.blocked, b.failed) == (1, 2, 0)
+    assert users_db[1]['blocked'] and users_db[2]['blocked']
+    assert list(iter_recipients(users_db)) == [3]
+
+
+def test_other_bad_requests_count_as_failed(checkpoint):
+    users_db = {1: {'status': 'approved'}}
+    bot = FakeBot(errors={1: [BadRequest("Message is too long")]})
+    b = Broadcast(bot, users_db, "hello", checkpoint_file=checkpoint)
+
+    asyncio.run(b.run())
+
+    assert (b.sent, b.blocked, b.failed) == (0, 0, 1)
+    assert bot.attempts == [1]
+    assert 'blocked' not in users_db[1]
+
+
+def test_completed_users_fold_into_cursor(checkpoint):
+    b = Broadcast(FakeBot(), {}, "hello", checkpoint_file=checkpoint)
+    b._pending = {1, 2, 3}
+
+    b._complete(2)
+    assert (b.cursor, b.done) == (None, {2})
+    b._complete(1)
+    assert (b.cursor, b.done) == (2, set())
+    b._complete(3)
+    assert (b.cursor, b.done) == (3, set())
+
+
+def test_cancelled_broadcast_resumes_without_duplicates(checkpoint):
+    users_db = make_users(400)
+    bot = FakeBot(delay=0.01)
+
+    async def cancel_then_resume():
+        b = Broadcast(bot, users_db, "hello", checkpoint_file=checkpoint)
+        b.start()
+        await asyncio.sleep(0.05)
+        await b.stop()
+        assert not b.finished and os.path.exists(checkpoint)
+        assert 0 < len(bot.sent) < 200
+
+        resumed = Broadcast.resume(bot, users_db, checkpoint)
+        await resumed.run()
+        return resumed
+
+    resumed = asyncio.run(cancel_then_resume())
+
+    assert sorted(bot.sent) == approved(users_db)
+    assert resumed.finished and resumed.sent == 200
+
+
+def test_unexpected_errors_are_retried_on_resume(checkpoint):
+    # Mimics sends made after the bot's HTTP client was closed
+    users_db = make_users(20)
+    closed = RuntimeError("This HTTPXRequest is not initialized!")
+    bot = FakeBot(errors={3: [closed], 11: [closed]})
+    b = Broadcast(bot, users_db, "hello", checkpoint_file=checkpoint)
+
+    asyncio.run(b.run())
+
+    assert not b.finished and b.failed == 0
+    assert os.path.exists(checkpoint)
+    assert b.retry == {3, 11}
+    assert b.cursor == 19 and b.done == set()
+
+    resumed = Broadcast.resume(bot, users_db, checkpoint)
+    asyncio.run(resumed.run())
+
+    assert sorted(bot.sent) == approved(users_db)
+    assert resumed.finished and resumed.sent == 10
+
+
+def test_resume_keeps_checkpoint_when_store_is_empty(checkpoint):
+    users_db = make_users(10)
+    b = Broadcast(FakeBot(), users_db, "hello", checkpoint_file=checkpoint)
+    b._save()
+
+    assert Broadcast.resume(FakeBot(), {}, checkpoint) is None
+    assert os.path.exists(checkpoint)
+    assert Broadcast.resume(FakeBot(), users_db, checkpoint).text == "hello"
+
+
+def test_stuck_user_keeps_checkpoint_small(checkpoint, monkeypatch):
+    users_db = make_users(6000)
+    bot = FakeBot(errors={1: [RuntimeError("boom")]})
+    b = Broadcast(bot, users_db, "hello", checkpoint_file=checkpoint)
+
+    sizes = []
+    save = Broadcast._save
+
+    def measured_save(self):
+        save(self)
+        sizes.append((os.path.getsize(checkpoint), len(self.done)))
+
+    monkeypatch.setattr(Broadcast, '_save', measured_save)
+    asyncio.run(b.run())
+
+    assert b.sent == 2999 and b.retry == {1}
+    assert max(size for size, _ in sizes) < 1000
+    assert max(done for _, done in sizes) <= broadcast.CONCURRENCY * 3
+
+
+def test_gives_up_after_too_many_errors(checkpoint, monkeypatch):
+    monkeypatch.setattr(broadcast, 'MAX_ERRORS', 5)
+    users_db = make_users(2000)
+    bot = FakeBot(errors={i: [RuntimeError("boom")] for i in users_db})
+    b = Broadcast(bot, users_db, "hello", checkpoint_file=checkpoint)
+
+    asyncio.run(b.run())
+
+    assert not b.finished and b.sent == 0
+    assert len(bot.attempts) < 50
+    assert len(b.retry) < 50
+    assert os.path.exists(checkpoint)
+
+
+def test_stopped_broadcast_reports_unreached_users(checkpoint):
+    users_db = make_users(20)
+    bot = FakeBot(errors={3: [RuntimeError("boom")]})
+    b = Broadcast(bot, users_db, "hello", checkpoint_file=checkpoint)
+
+    asyncio.run(b.run())
+
+    assert "Stopped, 1 users not reached" in b.report()
+    saved = Broadcast.from_checkpoint(bot, {}, load_checkpoint(checkpoint), checkpoint)
+    assert (saved.total, saved.unreached, saved.retry) == (10, 1, {3})
+
+    assert discard_checkpoint(checkpoint)
+    assert load_checkpoint(checkpoint) is None
+    assert not discard_checkpoint(checkpoint)
+
+
+def test_entities_are_sent_and_checkpointed(checkpoint):
+    users_db = {1: {'status': 'approved'}}
+    bold = MessageEntity(MessageEntity.BOLD, 0, 5)
+    b = Broadcast(FakeBot(), users_db, "hello world", checkpoint_file=checkpoint, entities=[bold])
+    b._save()
+
+    saved = Broadcast.resume(FakeBot(), users_db, checkpoint)
+    assert saved.entities == (bold,)
+
+    asyncio.run(saved.run())
+    assert saved.bot.entities == (bold,)
@@ -0,0 +1,184 @@
+import asyncio
+import json
+import time
+
+import pytest
+from telegram import Update
+from telegram.ext import Application
+
+import broadcast
+import verification_bot
+from replay import FAKE_TOKEN, FakeBotAPI
+
+ADMIN = 99
+
+
+class RecordingBotAPI(FakeBotAPI):
+    """Fake Bot API that also keeps the parameters of every call."""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    async def do_request(self, url, method, request_data=None, **kwargs):
+        params = request_data.parameters if request_data else {}
+        self.requests.append((url.rsplit('/', 1)[-1], params))
+        return await super().do_request(url, method, request_data, **kwargs)
+
+    def texts_to(self, chat_id):
+        return [p['text'] for m, p in self.requests if m == 'sendMessage' and p['chat_id'] == chat_id]
+
+
+@pytest.fixture(autouse=True)
+def fresh_bot(tmp_path, monkeypatch):
+    # The default checkpoint path is relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(verification_bot, 'ADMIN_ID', ADMIN)
+    monkeypatch.setattr(broadcast, 'MESSAGES_PER_SECOND', 100000)
+    verification_bot.users_db.clear()
+    verification_bot.users_db.update({
+        1: {'status': 'approved'},
+        2: {'status': 'pending'},
+        3: {'status': 'approved'},
+    })
+    yield
+    verification_bot.users_db.clear()
+
+
+def command(update_id, user_id, text, entities=()):
+    length = len(text.split(None, 1)[0])
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': 'Admin'},
+            'text': text,
+            'entities': [{'type': 'bot_command', 'offset': 0, 'length': length}, *entities],
+        },
+    }
+
+
+def run(*updates):
+    """Feed updates to a fresh bot, wait for any broadcast and return the fake API."""
+    api = RecordingBotAPI()
+
+    async def scenario():
+        application = verification_bot.build_application(
+            Application.builder().token(FAKE_TOKEN).request(api).get_updates_request(FakeBotAPI()),
+            record_dir=None,
+        )
+        async with application:
+            for data in updates:
+                await application.process_update(Update.de_json(data, application.bot))
+            current = application.bot_data.get('broadcast')
+            if current and current.running:
+                await current._task
+        return application
+
+    api.application = asyncio.run(scenario())
+    return api
+
+
+def test_broadcast_sends_text_with_formatting_to_approved_users():
+    text = "/broadcast 📣 *News*\n\nline  two"
+    # Offsets count UTF-16 code units; the emoji takes two
+    bold = {'type': 'bold', 'offset': 14, 'length': 6}
+    api = run(command(1, ADMIN, text, [bold]))
+
+    assert api.texts_to(1) == ["📣 *News*\n\nline  two"]
+    assert api.texts_to(3) == ["📣 *News*\n\nline  two"]
+    assert api.texts_to(2) == []
+    sent = [p for m, p in api.requests if m == 'sendMessage' and p['chat_id'] == 1][0]
+    assert sent['entities'] == [{'type': 'bold', 'offset': 3, 'length': 6}]
+
+
+def test_broadcast_ignores_non_admins():
+    api = run(command(1, 5, "/broadcast hello"), command(2, 5, "/broadcast_status"))
+
+    assert 'broadcast' not in api.application.bot_data
+    assert [m for m, _ in api.requests if m == 'sendMessage'] == []
+
+
+def test_broadcast_without_text_is_rejected():
+    api = run(command(1, ADMIN, "/broadcast   "))
+
+    assert api.texts_to(ADMIN) == ["❌ Invalid format. Use: `/broadcast MESSAGE`"]
+    assert 'broadcast' not in api.application.bot_data
+
+
+def test_broadcast_over_length_limit_is_rejected():
+    api = run(command(1, ADMIN, "/broadcast " + "x" * 4097))
+
+    assert api.texts_to(ADMIN)[0].startswith("❌ Invalid format.")
+    assert api.texts_to(1) == []
+
+
+def test_second_broadcast_while_running_is_refused(monkeypatch):
+    monkeypatch.setattr(broadcast, 'MESSAGES_PER_SECOND', 1)
+    api = RecordingBotAPI()
+
+    async def scenario():
+        application = verification_bot.build_application(
+            Application.builder().token(FAKE_TOKEN).request(api).get_updates_request(FakeBotAPI()),
+            record_dir=None,
+        )
+        async with application:
+            for data in [command(1, ADMIN, "/broadcast one"), command(2, ADMIN, "/broadcast two")]:
+                await application.process_update(Update.de_json(data, application.bot))
+            await application.post_stop(application)
+
+    asyncio.run(scenario())
+
+    assert any(t.startswith("⏳ A broadcast is already running") for t in api.texts_to(ADMIN))
+    assert "two" not in api.texts_to(1) + api.texts_to(3)
+
+
+def test_unfinished_checkpoint_blocks_new_broadcast_until_discarded():
+    checkpoint = {
+        'text': "old", 'entities': [], 'status': 'approved', 'admin_chat_id': ADMIN,
+        'cursor': 1, 'done': [], 'retry': [], 'sent': 1, 'failed': 0, 'blocked': 0,
+        'total': 2, 'started_at': time.time(),
+    }
+    with open(broadcast.CHECKPOINT_FILE, 'w') as f:
+        json.dump(checkpoint, f)
+
+    api = run(
+        command(1, ADMIN, "/broadcast new"),
+        command(2, ADMIN, "/broadcast_status"),
+        command(3, ADMIN, "/broadcast_discard"),
+        command(4, ADMIN, "/broadcast new"),
+    )
+
+    replies = api.texts_to(ADMIN)
+    assert replies[0].startswith("⚠️ An unfinished broadcast didn't reach 1 users.")
+    assert "Stopped, 1 users not reached" in replies[1]
+    assert replies[2] == "🗑 Unfinished broadcast discarded."
+    assert api.texts_to(1) == ["new"] and api.texts_to(3) == ["new"]
+
+
+def test_broadcast_resume_continues_unfinished_broadcast():
+    checkpoint = {
+        'text': "old", 'entities': [], 'status': 'approved', 'admin_chat_id': ADMIN,
+        'cursor': 1, 'done': [], 'retry': [], 'sent': 1, 'failed': 0, 'blocked': 0,
+        'total': 2, 'started_at': time.time(),
+    }
+    with open(broadcast.CHECKPOINT_FILE, 'w') as f:
+        json.dump(checkpoint, f)
+
+    api = run(command(1, ADMIN, "/broadcast_resume"))
+
+    assert api.texts_to(1) == []
+    assert api.texts_to(3) == ["old"]
+    assert api.application.bot_data['broadcast'].finished
+    assert broadcast.load_checkpoint() is None
+
+
+def test_broadcast_status_without_broadcast():
+    api = run(command(1, ADMIN, "/broadcast_status"), command(2, ADMIN, "/broadcast_resume"))
+
+    assert api.texts_to(ADMIN) == [
+        "No broadcast has been sent yet.",
+        "No unfinished broadcast to resume.",
+    ]
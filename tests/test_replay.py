@@ -0,0 +1,116 @@
+import asyncio
+import time
+
+import pytest
+from telegram import Update
+from telegram.ext import Application
+
+import verification_bot
+from recorder import read_records
+from replay import FAKE_TOKEN, FakeBotAPI, replay
+
+ADMIN = 99
+USER = 10
+
+
+def message_update(update_id, user_id, text=None, contact=False, photo=False):
+    message = {
+        'message_id': update_id,
+        'date': int(time.time()),
+        'chat': {'id': user_id, 'type': 'private'},
+        'from': {'id': user_id, 'is_bot': False, 'first_name': f'User {user_id}'},
+    }
+    if text:
+        message['text'] = text
+        message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text)}]
+    if contact:
+        message['contact'] = {'phone_number': '+100', 'first_name': 'User', 'user_id': user_id}
+    if photo:
+        message['photo'] = [{'file_id': 'file', 'file_unique_id': 'unique', 'width': 1, 'height': 1}]
+    return {'update_id': update_id, 'message': message}
+
+
+VERIFY_FLOW = [
+    message_update(1, USER, text='/verify'),
+    message_update(2, USER, contact=True),
+    message_update(3, USER, photo=True),
+    message_update(4, USER, photo=True),
+    message_update(5, USER, photo=True),
+    message_update(6, ADMIN, text=f'/approve_{USER}'),
+]
+
+
+@pytest.fixture(autouse=True)
+def fresh_bot(monkeypatch):
+    monkeypatch.setattr(verification_bot, 'ADMIN_ID', ADMIN)
+    verification_bot.users_db.clear()
+    yield
+    verification_bot.users_db.clear()
+
+
+def record_flow(directory):
+    """Run the verify flow through a recording bot and return its records."""
+    async def run():
+        application = verification_bot.build_application(
+            Application.builder().token(FAKE_TOKEN).request(FakeBotAPI())
+            .get_updates_request(FakeBotAPI()),
+            record_dir=str(directory),
+        )
+        async with application:
+            for data in VERIFY_FLOW:
+                await application.process_update(Update.de_json(data, application.bot))
+            await application.post_stop(application)
+
+    asyncio.run(run())
+    assert verification_bot.users_db[USER]['status'] == 'approved'
+    verification_bot.users_db.clear()
+    return list(read_records([str(directory)]))
+
+
+def test_recorded_flow_replays_cleanly(tmp_path):
+    records = record_flow(tmp_path)
+
+    assert [r['update']['update_id'] for r in records] == [1, 2, 3, 4, 5, 6]
+    assert records[4]['state'] == verification_bot.PRODUCT_PHOTO
+    assert records[4]['after'] == {'state': None, 'status': 'pending'}
+    assert records[5]['targets'] == {str(USER): 'pending'}
+    assert records[5]['after']['targets'] == {str(USER): 'approved'}
+
+    result = asyncio.run(replay(records, True, verification_bot))
+
+    assert result['replayed'] == 6
+    assert result['errors'] == []
+    assert result['divergences'] == []
+    assert 'product_photo_handler' in result['latencies']
+    assert verification_bot.users_db[USER]['status'] == 'approved'
+
+
+def test_state_change_is_reported(tmp_path):
+    records = record_flow(tmp_path)
+    # Pretend the final step used to leave the user mid-conversation
+    records[4]['after'] = {'state': verification_bot.PRODUCT_PHOTO, 'status': 'in_progress'}
+
+    result = asyncio.run(replay(records, True, verification_bot))
+
+    assert result['divergences'] == [(
+        5, USER, 'after',
+        {'state': verification_bot.PRODUCT_PHOTO, 'status': 'in_progress'},
+        {'state': None, 'status': 'pending'},
+    )]
+
+
+def test_broken_approval_is_reported(tmp_path, monkeypatch):
+    records = record_flow(tmp_path)
+
+    async def approve_nothing(update, context):
+        pass
+
+    monkeypatch.setattr(verification_bot, 'admin_approve', approve_nothing)
+    result = asyncio.run(replay(records, True, verification_bot))
+
+    assert result['errors'] == []
+    assert result['divergences'] == [(
+        6, ADMIN, 'after',
+        {'state': None, 'status': None, 'targets': {str(USER): 'approved'}},
+        {'state': None, 'status': None, 'targets': {str(USER): 'pending'}},
+    )]